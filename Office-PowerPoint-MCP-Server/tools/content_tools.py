@@ -2,17 +2,54 @@
 Content management tools for PowerPoint MCP Server.
 Handles slides, text, images, and content manipulation.
 """
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 from mcp.server.fastmcp import FastMCP
 import utils as ppt_utils
-import tempfile
+import io
 import base64
 import os
 from pptx import Presentation
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
+import httpx
 import json
 import logging
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 from pptx.util import Pt
+from pptx.dml.color import RGBColor
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.oxml.text import CT_RegularTextRun
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from xml.sax.saxutils import escape, quoteattr
+
+# 并发请求OpenAI的最大线程数，应与API的速率限制相匹配
+MAX_CONCURRENT_REQUESTS = 16
+
+# 所有内容生成请求共用的系统消息
+SYSTEM_MSG = [{"role": "system", "content": "你是一个专业的PPT内容生成助手。"}]
+
+# 预先构建的提示词模板，避免每个形状重新拼装多行字符串
+PROMPT_TPL = "根据以下大纲信息生成PPT内容：\n{section}\n\n形状信息：\n{shape}\n\n请生成适合该形状的专业PPT内容。"
+SHAPE_INFO_TPL = '{{"type": "text", "position": {{"x": {0}, "y": {1}}}, "size": {{"width": {2}, "height": {3}}}}}'
+
+# 预绑定的JSON编码器（保留中文字符）
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+# Shared error payloads for the common failure paths. Callers get a copy,
+# since the MCP framework may mutate the returned dict.
+_ERR_NO_PRES = MappingProxyType({"error": "No presentation is currently loaded or the specified ID is invalid"})
+
+
+def _invalid_slide_error(slide_index: int, n_slides: int) -> Dict:
+    """Build the error payload for an out-of-range slide index."""
+    return {"error": f"Invalid slide index: {slide_index}. Available slides: 0-{n_slides - 1}"}
+
+
+# 按 (api_key, base_url) 缓存的OpenAI客户端
+_CLIENT_CACHE: Dict[Tuple[str, str], OpenAI] = {}
+_CLIENT_LOCK = threading.Lock()
 
 
 def register_content_tools(app: FastMCP, presentations: Dict, get_current_presentation_id, validate_parameters, is_positive, is_non_negative, is_in_range, is_valid_rgb):
@@ -32,22 +69,21 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
         # Validate layout index
-        if layout_index < 0 or layout_index >= len(pres.slide_layouts):
+        n_layouts = len(pres.slide_layouts)
+        if layout_index < 0 or layout_index >= n_layouts:
             return {
-                "error": f"Invalid layout index: {layout_index}. Available layouts: 0-{len(pres.slide_layouts) - 1}"
+                "error": f"Invalid layout index: {layout_index}. Available layouts: 0-{n_layouts - 1}"
             }
         
         try:
-            # Add the slide
+            # Add the slide; its index is the slide count before the add
+            slide_index = len(pres.slides)
             slide, layout = ppt_utils.add_slide(pres, layout_index)
-            slide_index = len(pres.slides) - 1
             
             # Set title if provided
             if title:
@@ -79,16 +115,13 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
-        if slide_index < 0 or slide_index >= len(pres.slides):
-            return {
-                "error": f"Invalid slide index: {slide_index}. Available slides: 0-{len(pres.slides) - 1}"
-            }
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
         
         slide = pres.slides[slide_index]
         
@@ -110,16 +143,13 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
-        if slide_index < 0 or slide_index >= len(pres.slides):
-            return {
-                "error": f"Invalid slide index: {slide_index}. Available slides: 0-{len(pres.slides) - 1}"
-            }
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
         
         slide = pres.slides[slide_index]
         
@@ -144,16 +174,13 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
-        if slide_index < 0 or slide_index >= len(pres.slides):
-            return {
-                "error": f"Invalid slide index: {slide_index}. Available slides: 0-{len(pres.slides) - 1}"
-            }
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
         
         slide = pres.slides[slide_index]
         
@@ -168,6 +195,229 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
                 "error": f"Failed to add bullet points: {str(e)}"
             }
 
+    @app.tool()
+    def populate_slide_content(
+        slide_index: int,
+        placeholders: Optional[List[Dict[str, Any]]] = None,  # [{"placeholder_idx": int, "text": str}]
+        bullet_lists: Optional[List[Dict[str, Any]]] = None,  # [{"placeholder_idx": int, "bullet_points": [str]}]
+        presentation_id: Optional[str] = None
+    ) -> Dict:
+        """Populate several placeholders and bullet lists on one slide in a single call."""
+        pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
+        
+        if pres_id is None or pres_id not in presentations:
+            return dict(_ERR_NO_PRES)
+        
+        pres = presentations[pres_id]
+        
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
+        
+        slide = pres.slides[slide_index]
+        
+        try:
+            # Resolve all placeholders with a single walk
+            ph_map = {ph.placeholder_format.idx: ph for ph in slide.placeholders}
+        except Exception as e:
+            return {
+                "error": f"Failed to read placeholders: {str(e)}"
+            }
+        
+        results = []
+        
+        for entry in placeholders or []:
+            placeholder_idx = entry.get("placeholder_idx") if isinstance(entry, dict) else None
+            try:
+                if not isinstance(entry, dict):
+                    raise ValueError(f"entry must be an object, got {type(entry).__name__}")
+                placeholder = ph_map.get(placeholder_idx)
+                if placeholder is None:
+                    results.append({"placeholder_idx": placeholder_idx, "error": f"Placeholder {placeholder_idx} not found on slide {slide_index}"})
+                    continue
+                ppt_utils.set_placeholder_text(placeholder, entry.get("text", ""))
+                results.append({"placeholder_idx": placeholder_idx, "message": f"Populated placeholder {placeholder_idx}"})
+            except Exception as e:
+                results.append({"placeholder_idx": placeholder_idx, "error": f"Failed to populate placeholder: {str(e)}"})
+        
+        for entry in bullet_lists or []:
+            placeholder_idx = entry.get("placeholder_idx") if isinstance(entry, dict) else None
+            try:
+                if not isinstance(entry, dict):
+                    raise ValueError(f"entry must be an object, got {type(entry).__name__}")
+                placeholder = ph_map.get(placeholder_idx)
+                if placeholder is None:
+                    results.append({"placeholder_idx": placeholder_idx, "error": f"Placeholder {placeholder_idx} not found on slide {slide_index}"})
+                    continue
+                bullet_points = entry.get("bullet_points", [])
+                ppt_utils.add_bullet_points(placeholder, bullet_points)
+                results.append({"placeholder_idx": placeholder_idx, "message": f"Added {len(bullet_points)} bullet points to placeholder {placeholder_idx}"})
+            except Exception as e:
+                results.append({"placeholder_idx": placeholder_idx, "error": f"Failed to add bullet points: {str(e)}"})
+        
+        return {
+            "message": f"Processed {len(results)} placeholder entries on slide {slide_index}",
+            "slide_index": slide_index,
+            "results": results
+        }
+
+    def _add_text(slide, slide_index: int, n_shapes: int, left: float, top: float, width: float, height: float,
+                  text: str, font_size, font_name, bold, italic, underline, color, bg_color,
+                  alignment, vertical_alignment, auto_fit: bool, **_) -> Dict:
+        """manage_text "add" operation."""
+        # Add new textbox
+        shape = ppt_utils.add_textbox(
+            slide, left, top, width, height, text,
+            font_size=font_size,
+            font_name=font_name,
+            bold=bold,
+            italic=italic,
+            underline=underline,
+            color=tuple(color) if color else None,
+            bg_color=tuple(bg_color) if bg_color else None,
+            alignment=alignment,
+            vertical_alignment=vertical_alignment,
+            auto_fit=auto_fit
+        )
+        return {
+            "message": f"Added text box to slide {slide_index}",
+            "shape_index": n_shapes,
+            "text": text
+        }
+
+    def _format_text(slide, slide_index: int, n_shapes: int, shape_index, font_size, font_name, bold, italic,
+                     underline, color, bg_color, alignment, vertical_alignment, **_) -> Dict:
+        """manage_text "format" operation."""
+        # Format existing text shape
+        if shape_index is None or shape_index < 0 or shape_index >= n_shapes:
+            return {
+                "error": f"Invalid shape index for formatting: {shape_index}. Available shapes: 0-{n_shapes - 1}"
+            }
+        
+        shape = slide.shapes[shape_index]
+        ppt_utils.format_text_advanced(
+            shape,
+            font_size=font_size,
+            font_name=font_name,
+            bold=bold,
+            italic=italic,
+            underline=underline,
+            color=tuple(color) if color else None,
+            bg_color=tuple(bg_color) if bg_color else None,
+            alignment=alignment,
+            vertical_alignment=vertical_alignment
+        )
+        return {
+            "message": f"Formatted text shape {shape_index} on slide {slide_index}"
+        }
+
+    def _validate_text(slide, slide_index: int, n_shapes: int, shape_index, text: str, font_size,
+                       validation_only: bool, min_font_size: int, max_font_size: int, **_) -> Dict:
+        """manage_text "validate" operation."""
+        # Validate text fit
+        if shape_index is None or shape_index < 0 or shape_index >= n_shapes:
+            return {
+                "error": f"Invalid shape index for validation: {shape_index}. Available shapes: 0-{n_shapes - 1}"
+            }
+        
+        validation_result = ppt_utils.validate_text_fit(
+            slide.shapes[shape_index],
+            text_content=text or None,
+            font_size=font_size or 12
+        )
+        
+        if not validation_only and validation_result.get("needs_optimization"):
+            # Apply automatic fixes
+            fix_result = ppt_utils.validate_and_fix_slide(
+                slide,
+                auto_fix=True,
+                min_font_size=min_font_size,
+                max_font_size=max_font_size
+            )
+            validation_result.update(fix_result)
+        
+        return validation_result
+
+    def _format_text_runs(slide, slide_index: int, n_shapes: int, shape_index, text_runs, **_) -> Dict:
+        """manage_text "format_runs" operation."""
+        # Format multiple text runs with different formatting
+        if shape_index is None or shape_index < 0 or shape_index >= n_shapes:
+            return {
+                "error": f"Invalid shape index for format_runs: {shape_index}. Available shapes: 0-{n_shapes - 1}"
+            }
+        
+        if not text_runs:
+            return {"error": "text_runs parameter is required for format_runs operation"}
+        
+        shape = slide.shapes[shape_index]
+        
+        # Check if shape has text
+        if not hasattr(shape, 'text_frame') or not shape.text_frame:
+            return {"error": "Shape does not contain text"}
+        
+        # Validate runs once, before touching the text frame
+        for i, run_data in enumerate(text_runs):
+            run_font_size = run_data.get('font_size')
+            if run_font_size is not None and not (is_positive(run_font_size) and 1 <= run_font_size <= 4000):
+                return {"error": f"Invalid font_size for text run {i}: {run_font_size}. Must be between 1 and 4000"}
+        
+        run_colors = [
+            RGBColor(*run_data['color']) if 'color' in run_data and is_valid_rgb(run_data['color']) else None
+            for run_data in text_runs
+        ]
+        
+        # Build all paragraphs as one XML fragment, one paragraph per run
+        paragraphs_xml = []
+        hyperlinks = []  # (paragraph position, address)
+        formatted_runs = []
+        
+        for run_data, run_color in zip(text_runs, run_colors):
+            if 'text' not in run_data:
+                continue
+            
+            if run_data.get('hyperlink'):
+                hyperlinks.append((len(paragraphs_xml), run_data['hyperlink']))
+            
+            paragraphs_xml.append(f"<a:p>{_run_xml(run_data, run_color)}</a:p>")
+            formatted_runs.append({
+                "text": run_data['text'],
+                "formatting_applied": {k: v for k, v in run_data.items() if k != 'text'}
+            })
+        
+        new_paragraphs = list(parse_xml(
+            f'<p:txBody {nsdecls("a", "p", "r")}>{"".join(paragraphs_xml) or "<a:p/>"}</p:txBody>'
+        ))
+        
+        # Relate hyperlinks only once the markup parsed, so a failure leaves no orphan rels
+        for position, address in hyperlinks:
+            rId = shape.part.relate_to(address, RT.HYPERLINK, is_external=True)
+            new_paragraphs[position].r_lst[0].get_or_add_rPr().add_hlinkClick(rId)
+        
+        # Swap out the existing paragraphs, keeping the first paragraph's properties
+        txBody = shape.text_frame._txBody
+        old_paragraphs = txBody.findall(qn('a:p'))
+        pPr = old_paragraphs[0].find(qn('a:pPr')) if old_paragraphs else None
+        for paragraph in old_paragraphs:
+            txBody.remove(paragraph)
+        if pPr is not None:
+            new_paragraphs[0].insert(0, pPr)
+        txBody.extend(new_paragraphs)
+        
+        return {
+            "message": f"Applied formatting to {len(formatted_runs)} text runs on shape {shape_index}",
+            "slide_index": slide_index,
+            "shape_index": shape_index,
+            "formatted_runs": formatted_runs
+        }
+
+    # Dispatch table for manage_text operations
+    text_operations = {
+        "add": _add_text,
+        "format": _format_text,
+        "validate": _validate_text,
+        "format_runs": _format_text_runs,
+    }
+
     @app.tool()
     def manage_text(
         slide_index: int,
@@ -200,176 +450,41 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
-        if slide_index < 0 or slide_index >= len(pres.slides):
-            return {
-                "error": f"Invalid slide index: {slide_index}. Available slides: 0-{len(pres.slides) - 1}"
-            }
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
         
         slide = pres.slides[slide_index]
+        n_shapes = len(slide.shapes)
         
         # Validate parameters
-        validations = {}
-        if font_size is not None:
-            validations["font_size"] = (font_size, [(is_positive, "must be a positive integer")])
-        if color is not None:
-            validations["color"] = (color, [(is_valid_rgb, "must be a valid RGB list [R, G, B] with values 0-255")])
-        if bg_color is not None:
-            validations["bg_color"] = (bg_color, [(is_valid_rgb, "must be a valid RGB list [R, G, B] with values 0-255")])
-        
-        if validations:
-            valid, error = validate_parameters(validations)
-            if not valid:
-                return {"error": error}
+        if font_size is not None and not is_positive(font_size):
+            return {"error": "font_size must be a positive integer"}
+        if color is not None and not is_valid_rgb(color):
+            return {"error": "color must be a valid RGB list [R, G, B] with values 0-255"}
+        if bg_color is not None and not is_valid_rgb(bg_color):
+            return {"error": "bg_color must be a valid RGB list [R, G, B] with values 0-255"}
+        
+        handler = text_operations.get(operation)
+        if handler is None:
+            return {
+                "error": f"Invalid operation: {operation}. Must be 'add', 'format', 'validate', or 'format_runs'"
+            }
         
         try:
-            if operation == "add":
-                # Add new textbox
-                shape = ppt_utils.add_textbox(
-                    slide, left, top, width, height, text,
-                    font_size=font_size,
-                    font_name=font_name,
-                    bold=bold,
-                    italic=italic,
-                    underline=underline,
-                    color=tuple(color) if color else None,
-                    bg_color=tuple(bg_color) if bg_color else None,
-                    alignment=alignment,
-                    vertical_alignment=vertical_alignment,
-                    auto_fit=auto_fit
-                )
-                return {
-                    "message": f"Added text box to slide {slide_index}",
-                    "shape_index": len(slide.shapes) - 1,
-                    "text": text
-                }
-            
-            elif operation == "format":
-                # Format existing text shape
-                if shape_index is None or shape_index < 0 or shape_index >= len(slide.shapes):
-                    return {
-                        "error": f"Invalid shape index for formatting: {shape_index}. Available shapes: 0-{len(slide.shapes) - 1}"
-                    }
-                
-                shape = slide.shapes[shape_index]
-                ppt_utils.format_text_advanced(
-                    shape,
-                    font_size=font_size,
-                    font_name=font_name,
-                    bold=bold,
-                    italic=italic,
-                    underline=underline,
-                    color=tuple(color) if color else None,
-                    bg_color=tuple(bg_color) if bg_color else None,
-                    alignment=alignment,
-                    vertical_alignment=vertical_alignment
-                )
-                return {
-                    "message": f"Formatted text shape {shape_index} on slide {slide_index}"
-                }
-            
-            elif operation == "validate":
-                # Validate text fit
-                if shape_index is None or shape_index < 0 or shape_index >= len(slide.shapes):
-                    return {
-                        "error": f"Invalid shape index for validation: {shape_index}. Available shapes: 0-{len(slide.shapes) - 1}"
-                    }
-                
-                validation_result = ppt_utils.validate_text_fit(
-                    slide.shapes[shape_index],
-                    text_content=text or None,
-                    font_size=font_size or 12
-                )
-                
-                if not validation_only and validation_result.get("needs_optimization"):
-                    # Apply automatic fixes
-                    fix_result = ppt_utils.validate_and_fix_slide(
-                        slide,
-                        auto_fix=True,
-                        min_font_size=min_font_size,
-                        max_font_size=max_font_size
-                    )
-                    validation_result.update(fix_result)
-                
-                return validation_result
-            
-            elif operation == "format_runs":
-                # Format multiple text runs with different formatting
-                if shape_index is None or shape_index < 0 or shape_index >= len(slide.shapes):
-                    return {
-                        "error": f"Invalid shape index for format_runs: {shape_index}. Available shapes: 0-{len(slide.shapes) - 1}"
-                    }
-                
-                if not text_runs:
-                    return {"error": "text_runs parameter is required for format_runs operation"}
-                
-                shape = slide.shapes[shape_index]
-                
-                # Check if shape has text
-                if not hasattr(shape, 'text_frame') or not shape.text_frame:
-                    return {"error": "Shape does not contain text"}
-                
-                # Clear existing text and rebuild with formatted runs
-                text_frame = shape.text_frame
-                text_frame.clear()
-                
-                formatted_runs = []
-                
-                for run_data in text_runs:
-                    if 'text' not in run_data:
-                        continue
-                        
-                    # Add paragraph if needed
-                    if not text_frame.paragraphs:
-                        paragraph = text_frame.paragraphs[0]
-                    else:
-                        paragraph = text_frame.add_paragraph()
-                    
-                    # Add run with text
-                    run = paragraph.add_run()
-                    run.text = run_data['text']
-                    
-                    # Apply formatting using pptx imports
-                    from pptx.util import Pt
-                    from pptx.dml.color import RGBColor
-                    
-                    if 'bold' in run_data:
-                        run.font.bold = run_data['bold']
-                    if 'italic' in run_data:
-                        run.font.italic = run_data['italic']
-                    if 'underline' in run_data:
-                        run.font.underline = run_data['underline']
-                    if 'font_size' in run_data:
-                        run.font.size = Pt(run_data['font_size'])
-                    if 'font_name' in run_data:
-                        run.font.name = run_data['font_name']
-                    if 'color' in run_data and is_valid_rgb(run_data['color']):
-                        run.font.color.rgb = RGBColor(*run_data['color'])
-                    if 'hyperlink' in run_data:
-                        run.hyperlink.address = run_data['hyperlink']
-                    
-                    formatted_runs.append({
-                        "text": run_data['text'],
-                        "formatting_applied": {k: v for k, v in run_data.items() if k != 'text'}
-                    })
-                
-                return {
-                    "message": f"Applied formatting to {len(formatted_runs)} text runs on shape {shape_index}",
-                    "slide_index": slide_index,
-                    "shape_index": shape_index,
-                    "formatted_runs": formatted_runs
-                }
-            
-            else:
-                return {
-                    "error": f"Invalid operation: {operation}. Must be 'add', 'format', 'validate', or 'format_runs'"
-                }
-        
+            return handler(
+                slide, slide_index, n_shapes,
+                left=left, top=top, width=width, height=height, text=text,
+                shape_index=shape_index, text_runs=text_runs,
+                font_size=font_size, font_name=font_name, bold=bold, italic=italic, underline=underline,
+                color=color, bg_color=bg_color, alignment=alignment, vertical_alignment=vertical_alignment,
+                auto_fit=auto_fit, validation_only=validation_only,
+                min_font_size=min_font_size, max_font_size=max_font_size
+            )
         except Exception as e:
             return {
                 "error": f"Failed to {operation} text: {str(e)}"
@@ -400,38 +515,30 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
         pres_id = presentation_id if presentation_id is not None else get_current_presentation_id()
         
         if pres_id is None or pres_id not in presentations:
-            return {
-                "error": "No presentation is currently loaded or the specified ID is invalid"
-            }
+            return dict(_ERR_NO_PRES)
         
         pres = presentations[pres_id]
         
-        if slide_index < 0 or slide_index >= len(pres.slides):
-            return {
-                "error": f"Invalid slide index: {slide_index}. Available slides: 0-{len(pres.slides) - 1}"
-            }
+        n_slides = len(pres.slides)
+        if slide_index < 0 or slide_index >= n_slides:
+            return _invalid_slide_error(slide_index, n_slides)
         
         slide = pres.slides[slide_index]
+        # Index the next added shape will get
+        n_shapes = len(slide.shapes)
         
         try:
             if operation == "add":
                 if source_type == "base64":
                     # Handle base64 image
                     try:
-                        image_data = base64.b64decode(image_source)
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
-                            temp_file.write(image_data)
-                            temp_path = temp_file.name
-                        
-                        # Add image from temporary file
-                        shape = ppt_utils.add_image(slide, temp_path, left, top, width, height)
-                        
-                        # Clean up temporary file
-                        os.unlink(temp_path)
+                        # Add image directly from the decoded bytes, no temporary file needed
+                        image_stream = io.BytesIO(base64.b64decode(image_source))
+                        shape = ppt_utils.add_image(slide, image_stream, left, top, width, height)
                         
                         return {
                             "message": f"Added image from base64 to slide {slide_index}",
-                            "shape_index": len(slide.shapes) - 1
+                            "shape_index": n_shapes
                         }
                     except Exception as e:
                         return {
@@ -447,7 +554,7 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
                     shape = ppt_utils.add_image(slide, image_source, left, top, width, height)
                     return {
                         "message": f"Added image to slide {slide_index}",
-                        "shape_index": len(slide.shapes) - 1,
+                        "shape_index": n_shapes,
                         "image_path": image_source
                     }
             
@@ -496,6 +603,165 @@ def register_content_tools(app: FastMCP, presentations: Dict, get_current_presen
                 "error": f"Failed to {operation} image: {str(e)}"
             }
 
+def _run_xml(run_data: Dict, color: Optional[RGBColor] = None) -> str:
+    """
+    Build the <a:r> markup for one format_runs entry (hyperlinks are added after parsing).
+    
+    Args:
+        run_data: Run definition with 'text' and optional formatting keys
+        color: Validated run color (optional)
+        
+    Returns:
+        The run element as an XML string (a:/r: prefixes, no namespace declarations)
+    """
+    attrs = ""
+    if run_data.get('font_size') is not None:
+        attrs += f' sz="{Pt(run_data["font_size"]).centipoints}"'
+    if run_data.get('bold') is not None:
+        attrs += f' b="{int(bool(run_data["bold"]))}"'
+    if run_data.get('italic') is not None:
+        attrs += f' i="{int(bool(run_data["italic"]))}"'
+    if run_data.get('underline') is not None:
+        attrs += f' u="{"sng" if run_data["underline"] else "none"}"'
+    
+    # Child order follows the CT_TextCharacterProperties schema
+    children = ""
+    if color is not None:
+        children += f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+    if run_data.get('font_name'):
+        children += f'<a:latin typeface={quoteattr(run_data["font_name"])}/>'
+    
+    # Control characters are illegal in XML; encode them as "_xHHHH_" like run.text does
+    text = escape(CT_RegularTextRun._escape_ctrl_chars(str(run_data["text"])))
+    return f'<a:r><a:rPr{attrs}>{children}</a:rPr><a:t>{text}</a:t></a:r>'
+
+
+def _xywh(shape) -> Tuple[int, int, int, int]:
+    """
+    一次性读取形状的位置和尺寸（EMU整数），缺失的值按0处理
+    """
+    return int(shape.left or 0), int(shape.top or 0), int(shape.width or 0), int(shape.height or 0)
+
+
+def _apply_default_font(text_frame, size, font_name: str) -> None:
+    """
+    在文本框级别一次性设置默认字号和字体
+    
+    写入 txBody 的 <a:lstStyle>/<a:lvl1pPr>/<a:defRPr>，代替逐段落设置 font。
+    如果段落已有层级、默认运行属性或运行级别的字号/字体，则退回逐段落设置，
+    以免被这些覆盖属性遮蔽。
+    """
+    txBody = text_frame._txBody
+    lstStyle = txBody.find(qn('a:lstStyle'))
+    if lstStyle is None:
+        # lstStyle 紧跟在 bodyPr 之后
+        lstStyle = parse_xml(f'<a:lstStyle {nsdecls("a")}/>')
+        txBody.bodyPr.addnext(lstStyle)
+    overridden = txBody.xpath(
+        './a:p/a:pPr[@lvl and @lvl!="0"] | ./a:p/a:pPr/a:defRPr'
+        ' | ./a:p/a:r/a:rPr[@sz] | ./a:p/a:r/a:rPr/a:latin'
+    )
+    if overridden or lstStyle.find(qn('a:lvl1pPr')) is not None:
+        for paragraph in text_frame.paragraphs:
+            paragraph.font.size = size
+            paragraph.font.name = font_name
+        return
+    
+    lvl1pPr = parse_xml(
+        f'<a:lvl1pPr {nsdecls("a")}><a:defRPr sz="{size.centipoints}">'
+        f'<a:latin typeface="{font_name}"/></a:defRPr></a:lvl1pPr>'
+    )
+    # lvl1pPr 必须位于 defPPr 之后
+    lstStyle.insert(1 if lstStyle.find(qn('a:defPPr')) is not None else 0, lvl1pPr)
+
+
+def _get_client(api_key: str, base_url: str) -> OpenAI:
+    """
+    按 (api_key, base_url) 复用OpenAI客户端，保留连接池和TLS会话
+    """
+    key = (api_key, base_url)
+    with _CLIENT_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=DefaultHttpxClient(limits=httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS * 2))
+            )
+            _CLIENT_CACHE[key] = client
+    return client
+
+
+def _populate_presentation(prs: Presentation, outline: Dict[str, Any], client: OpenAI, model_name: str) -> Presentation:
+    """
+    根据大纲为模板中的所有文本形状生成内容
+    
+    Args:
+        prs: 已加载的PPT模板
+        outline: 大纲信息
+        client: OpenAI客户端
+        model_name: 使用的模型名称
+    
+    Returns:
+        Presentation: 填充内容后的演示文稿（原对象）
+    """
+    # 每个章节只序列化一次，供该章节下所有形状复用
+    section_jsons = [_encode_json(s) for s in outline["sections"]]
+    
+    # 预先计算每张幻灯片对应的章节索引（每5张幻灯片一个章节）
+    slides = list(prs.slides)
+    last_section = len(section_jsons) - 1
+    section_idx = [min(i // 5, last_section) for i in range(len(slides))]
+    
+    def _complete(prompt):
+        return client.chat.completions.create(
+            model=model_name,
+            messages=SYSTEM_MSG + [{"role": "user", "content": prompt}],
+            max_tokens=150
+        )
+    
+    # 遍历形状的同时提交请求（并发数受 MAX_CONCURRENT_REQUESTS 限制），
+    # 第一个请求无需等待整个演示文稿遍历完成即可发出
+    # 同一章节中名称、位置尺寸和模板文本完全相同的形状只请求一次，例如重复出现的页脚
+    jobs = []
+    futures = {}
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        for slide_index, slide in enumerate(slides):
+            # 获取当前部分的大纲内容
+            section_json = section_jsons[section_idx[slide_index]]
+            
+            # 先把形状快照为列表，写回阶段不再依赖实时的XML遍历顺序
+            shapes = list(slide.shapes)
+            slide_keys = set()
+            for shape in shapes:
+                if shape.has_text_frame:
+                    # 分析形状的样式和位置
+                    xywh = _xywh(shape)
+                    key = (section_idx[slide_index], xywh, shape.name, shape.text_frame.text)
+                    if key in slide_keys:
+                        # 同一张幻灯片上重叠的相同形状不是重复元素，各自生成内容
+                        key += (shape.shape_id,)
+                    slide_keys.add(key)
+                    if key not in futures:
+                        shape_info = SHAPE_INFO_TPL.format(*xywh)
+                        prompt = PROMPT_TPL.format(section=section_json, shape=shape_info)
+                        futures[key] = executor.submit(_complete, prompt)
+                    jobs.append((shape, key))
+    
+    responses = {key: future.result() for key, future in futures.items()}
+    
+    # 所有请求完成后在主线程中写回形状（lxml 对象非线程安全）
+    for shape, key in jobs:
+        # 更新形状的文本内容
+        generated_text = responses[key].choices[0].message.content.strip()
+        shape.text_frame.text = generated_text
+        
+        # 应用专业样式
+        _apply_default_font(shape.text_frame, Pt(18), 'Microsoft YaHei')
+    
+    return prs
+
+
 def generate_content_from_outline(
     template_path: str,
     outline_path: str,
@@ -519,8 +785,8 @@ def generate_content_from_outline(
         Dict[str, Any]: 包含生成结果的字典
     """
     try:
-        # 初始化OpenAI客户端
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        # 获取（复用）OpenAI客户端
+        client = _get_client(api_key, base_url)
         
         # 加载大纲文件
         with open(outline_path, 'r', encoding='utf-8') as f:
@@ -529,50 +795,8 @@ def generate_content_from_outline(
         # 加载PPT模板
         prs = Presentation(template_path)
         
-        # 遍历大纲中的每个部分
-        for slide_index, slide in enumerate(prs.slides):
-            # 获取当前部分的大纲内容
-            section_index = min(slide_index // 5, len(outline["sections"]) - 1)
-            current_section = outline["sections"][section_index]
-            
-            # 为每个形状生成内容
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    # 分析形状的样式和位置
-                    shape_info = {
-                        "type": "text",
-                        "position": {"x": shape.left, "y": shape.top},
-                        "size": {"width": shape.width, "height": shape.height}
-                    }
-                    
-                    # 使用OpenAI生成内容
-                    prompt = f"""
-                    根据以下大纲信息生成PPT内容：
-                    {json.dumps(current_section, ensure_ascii=False)}
-                    
-                    形状信息：
-                    {json.dumps(shape_info, ensure_ascii=False)}
-                    
-                    请生成适合该形状的专业PPT内容。
-                    """
-                    
-                    response = client.chat.completions.create(
-                        model=model_name,
-                        messages=[
-                            {"role": "system", "content": "你是一个专业的PPT内容生成助手。"},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=150
-                    )
-                    
-                    # 更新形状的文本内容
-                    generated_text = response.choices[0].message.content.strip()
-                    shape.text_frame.text = generated_text
-                    
-                    # 应用专业样式
-                    for paragraph in shape.text_frame.paragraphs:
-                        paragraph.font.size = Pt(18)  # 设置默认字号
-                        paragraph.font.name = 'Microsoft YaHei'  # 设置默认字体
+        # 为模板中的文本形状生成内容
+        _populate_presentation(prs, outline, client, model_name)
         
         # 保存生成的PPT
         prs.save(output_path)
@@ -588,4 +812,4 @@ def generate_content_from_outline(
         return {
             "success": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
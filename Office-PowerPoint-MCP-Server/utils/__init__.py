@@ -29,6 +29,7 @@ __all__ = [
     "get_slide_info",
     "set_title",
     "populate_placeholder",
+    "set_placeholder_text",
     "add_bullet_points",
     "add_textbox",
     "format_text",
@@ -8,7 +8,7 @@ from pptx.enum.chart import XL_CHART_TYPE
 from pptx.enum.text import PP_ALIGN
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union, IO
 import tempfile
 import os
 import base64
@@ -98,6 +98,17 @@ def populate_placeholder(slide, placeholder_idx: int, text: str) -> None:
         text: The text to add
     """
     placeholder = slide.placeholders[placeholder_idx]
+    set_placeholder_text(placeholder, text)
+
+
+def set_placeholder_text(placeholder, text: str) -> None:
+    """
+    Set the text of an already resolved placeholder.
+    
+    Args:
+        placeholder: The placeholder object
+        text: The text to add
+    """
     placeholder.text = text
 
 
@@ -282,13 +293,13 @@ def format_text_advanced(text_frame, font_size: int = None, font_name: str = Non
         return result
 
 
-def add_image(slide, image_path: str, left: float, top: float, width: float = None, height: float = None) -> Any:
+def add_image(slide, image_path: Union[str, IO[bytes]], left: float, top: float, width: float = None, height: float = None) -> Any:
     """
     Add an image to a slide.
     
     Args:
         slide: The slide object
-        image_path: Path to the image file
+        image_path: Path to the image file, or a file-like object with the image bytes
         left: Left position in inches
         top: Top position in inches
         width: Width in inches (optional)